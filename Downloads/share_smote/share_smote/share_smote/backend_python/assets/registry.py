@@ -1,22 +1,29 @@
 from __future__ import annotations
 import hashlib
-import json
 import mimetypes
-import os
 import shutil
-import tempfile
+import sqlite3
+import threading
 import time
 import uuid
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, astuple
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 import logging
-from filelock import FileLock
+import orjson
 from config import settings
 
 
 log = logging.getLogger(__name__)
 
+# Column order matches the Asset dataclass field order
+_COLUMNS = "id, filename, relpath, mimetype, size, sha256, created_at, label"
+_INSERT = f"INSERT INTO assets ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_INSERT_OR_IGNORE = _INSERT.replace("INSERT", "INSERT OR IGNORE", 1)
+_SELECT = f"SELECT {_COLUMNS} FROM assets"
+# Stay well below SQLite's default bound-parameter limit
+_MAX_IN_PARAMS = 500
+
 
 @dataclass
 class Asset:
@@ -44,111 +51,111 @@ class Asset:
 
 
 class AssetRegistry:
-    """Thread-safe registry for managing file assets with JSON persistence."""
+    """Thread-safe registry for managing file assets with SQLite persistence."""
 
-    def __init__(self, index_path: Path, lock_path: Optional[Path] = None) -> None:
+    def __init__(self, db_path: Path, legacy_index_path: Optional[Path] = None) -> None:
         """Initialize the asset registry.
 
         Args:
-            index_path: Path to the JSON index file
-            lock_path: Optional path to the lock file (defaults to index_path with .lock extension)
+            db_path: Path to the SQLite database file
+            legacy_index_path: Optional path to a JSON index written by earlier
+                versions; its records are imported once and the file is retired
         """
-        self.index_path = index_path
-        self.lock_path = lock_path or index_path.with_suffix(".lock")
-        self.lock = FileLock(str(self.lock_path), timeout=10)
-        self.ensure_index()
-
-    def ensure_index(self) -> None:
-        """Create the index file and parent directories if they don't exist."""
-        self.index_path.parent.mkdir(parents=True, exist_ok=True)
-        if not self.index_path.exists():
-            self.atomic_write({"version": 1, "assets": {}})
+        self.db_path = db_path
+        self._local = threading.local()
+        self.ensure_schema()
+        if legacy_index_path is not None:
+            self.migrate_legacy_index(legacy_index_path)
 
-    def read(self) -> Dict:
-        """Read the registry index from disk.
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's database connection, opening it on first use.
 
         Returns:
-            Dictionary containing registry data with 'version' and 'assets' keys
+            SQLite connection configured for WAL journaling
         """
-        if not self.index_path.exists():
-            return {"version": 1, "assets": {}}
-        try:
-            with self.index_path.open("r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            log.error(f"Failed to read registry: {e}")
-            return {"version": 1, "assets": {}}
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ensure_schema(self) -> None:
+        """Create the database file, parent directories and assets table."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS assets (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    relpath TEXT NOT NULL,
+                    mimetype TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    label TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS assets_created_at ON assets (created_at)"
+            )
 
-    def atomic_write(self, payload: Dict) -> None:
-        """Write registry data atomically to prevent corruption.
+    def migrate_legacy_index(self, legacy_path: Path) -> None:
+        """Import assets from a legacy JSON index and rename it out of the way.
 
         Args:
-            payload: Dictionary to write to the index file
-
-        Raises:
-            Exception: If write operation fails
+            legacy_path: Path to the former assetsindex.json file
         """
-        tmp = None
         try:
-            tmp = tempfile.NamedTemporaryFile(
-                "w",
-                delete=False,
-                dir=str(self.index_path.parent),
-                encoding="utf-8",
-                prefix=".tmp_registry_",
-            )
-            json.dump(payload, tmp, ensure_ascii=False, indent=2)
-            tmp.flush()
-            os.fsync(tmp.fileno())
-            tmp.close()
-            os.replace(tmp.name, self.index_path)
-            tmp = None
-        except Exception as e:
-            log.error(f"Failed to write registry: {e}")
-            raise
-        finally:
-            if tmp is not None:
-                try:
-                    os.unlink(tmp.name)
-                except OSError:
-                    pass
+            data = orjson.loads(legacy_path.read_bytes())
+        except FileNotFoundError:
+            return
+        except (orjson.JSONDecodeError, OSError) as e:
+            log.error(f"Failed to read legacy registry {legacy_path}: {e}")
+            return
+        rows = []
+        for aid, meta in data.get("assets", {}).items():
+            try:
+                rows.append(astuple(Asset(**meta)))
+            except (TypeError, KeyError) as e:
+                log.warning(f"Skipping malformed asset {aid}: {e}")
+        conn = self._connect()
+        with conn:
+            conn.executemany(_INSERT_OR_IGNORE, rows)
+        try:
+            legacy_path.replace(legacy_path.with_name(legacy_path.name + ".migrated"))
+        except OSError:
+            pass
+        log.info(f"Migrated {len(rows)} assets from {legacy_path.name}")
 
     @staticmethod
-    def sha256_file(p: Path, bufsize: int = 1024 * 1024) -> str:
+    def sha256_file(p: Path) -> str:
         """Calculate SHA-256 hash of a file.
 
+        The file is opened unbuffered so hashlib.file_digest reads straight
+        from the raw file into its own reusable buffer.
+
         Args:
             p: Path to the file
-            bufsize: Buffer size for reading (default 1MB)
 
         Returns:
             Hexadecimal SHA-256 hash string
         """
-        h = hashlib.sha256()
-        with p.open("rb") as f:
-            while True:
-                b = f.read(bufsize)
-                if not b:
-                    break
-                h.update(b)
-        return h.hexdigest()
+        with p.open("rb", buffering=0) as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
 
     def list_assets(self) -> List[Asset]:
         """Retrieve all assets from the registry.
 
         Returns:
-            List of Asset objects
+            List of Asset objects ordered by creation time
         """
-        with self.lock:
-            data = self.read()
-            assets: Dict[str, Dict] = data.get("assets", {})
-            out: List[Asset] = []
-            for aid, meta in assets.items():
-                try:
-                    out.append(Asset(**meta))
-                except (TypeError, KeyError) as e:
-                    log.warning(f"Skipping malformed asset {aid}: {e}")
-            return out
+        rows = self._connect().execute(f"{_SELECT} ORDER BY created_at").fetchall()
+        return [Asset(*row) for row in rows]
 
     def get_asset(self, asset_id: str) -> Optional[Asset]:
         """Retrieve a specific asset by ID.
@@ -159,15 +166,34 @@ class AssetRegistry:
         Returns:
             Asset object if found, None otherwise
         """
-        with self.lock:
-            data = self.read()
-            meta = data.get("assets", {}).get(asset_id)
-            if meta:
-                try:
-                    return Asset(**meta)
-                except (TypeError, KeyError) as e:
-                    log.error(f"Malformed asset metadata for {asset_id}: {e}")
-        return None
+        row = (
+            self._connect()
+            .execute(f"{_SELECT} WHERE id = ?", (asset_id,))
+            .fetchone()
+        )
+        return Asset(*row) if row else None
+
+    def get_many(self, asset_ids: Iterable[str]) -> Dict[str, Asset]:
+        """Retrieve several assets by ID with batched queries.
+
+        Args:
+            asset_ids: Asset identifiers to look up; duplicates are allowed
+
+        Returns:
+            Mapping of asset ID to Asset for the IDs that exist
+        """
+        ids = list(dict.fromkeys(asset_ids))
+        conn = self._connect()
+        found: Dict[str, Asset] = {}
+        for i in range(0, len(ids), _MAX_IN_PARAMS):
+            chunk = ids[i : i + _MAX_IN_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(
+                f"{_SELECT} WHERE id IN ({placeholders})", chunk
+            ).fetchall()
+            for row in rows:
+                found[row[0]] = Asset(*row)
+        return found
 
     def delete_asset(self, asset_id: str) -> bool:
         """Delete an asset from both filesystem and registry.
@@ -178,45 +204,49 @@ class AssetRegistry:
         Returns:
             True if deletion successful, False if asset not found
         """
-        with self.lock:
-            data = self.read()
-            assets: Dict[str, Dict] = data.get("assets", {})
-            meta = assets.get(asset_id)
-            if not meta:
-                return False
-            relpath = meta["relpath"]
-            abspath = settings.DATAPATH / relpath
-            try:
-                if abspath.exists():
-                    parent = abspath.parent
-                    abspath.unlink(missing_ok=True)
-                    # Remove empty parent directory if not the assets root
-                    try:
-                        if parent != settings.ASSETSPATH:
-                            parent.rmdir()
-                    except OSError:
-                        pass
-            except Exception as e:
-                log.error(f"Failed to delete asset file {abspath}: {e}")
-            finally:
-                assets.pop(asset_id, None)
-                data["assets"] = assets
-                self.atomic_write(data)
-                log.info(f"Deleted asset {asset_id}")
-            return True
-
-    def add_file(
-        self, source: Path, original_filename: str, label: Optional[str] = None
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT relpath FROM assets WHERE id = ?", (asset_id,)
+        ).fetchone()
+        if not row:
+            return False
+        relpath = row[0]
+        abspath = settings.DATAPATH / relpath
+        try:
+            if abspath.exists():
+                parent = abspath.parent
+                abspath.unlink(missing_ok=True)
+                # Remove empty parent directory if not the assets root
+                try:
+                    if parent != settings.ASSETSPATH:
+                        parent.rmdir()
+                except OSError:
+                    pass
+        except Exception as e:
+            log.error(f"Failed to delete asset file {abspath}: {e}")
+        finally:
+            with conn:
+                conn.execute("DELETE FROM assets WHERE id = ?", (asset_id,))
+            log.info(f"Deleted asset {asset_id}")
+        return True
+
+    def _prepare(
+        self,
+        source: Path,
+        original_filename: str,
+        label: Optional[str] = None,
+        sha256: Optional[str] = None,
     ) -> Asset:
-        """Add a file to the asset registry.
+        """Move a file into the assets directory and build its registry record.
 
         Args:
             source: Path to the source file to add
             original_filename: Original name of the file
             label: Optional label for categorization
+            sha256: Precomputed SHA-256 hex digest; the file is hashed if omitted
 
         Returns:
-            Asset object representing the added file
+            Asset object describing the moved file (not yet persisted)
 
         Raises:
             ValueError: If filename is invalid
@@ -234,10 +264,11 @@ class AssetRegistry:
             raise PermissionError("Attempted path traversal")
         shutil.move(str(source), str(dest))
         size = dest.stat().st_size
-        sha256 = self.sha256_file(dest)
+        if sha256 is None:
+            sha256 = self.sha256_file(dest)
         mimetype = mimetypes.guess_type(dest.name)[0] or "application/octet-stream"
         relpath = dest.relative_to(settings.DATAPATH).as_posix()
-        record = Asset(
+        return Asset(
             id=asset_id,
             filename=safename,
             relpath=relpath,
@@ -247,15 +278,63 @@ class AssetRegistry:
             created_at=time.time(),
             label=label,
         )
-        with self.lock:
-            data = self.read()
-            assets: Dict[str, Dict] = data.get("assets", {})
-            assets[asset_id] = asdict(record)
-            data["assets"] = assets
-            self.atomic_write(data)
-        log.info(f"Added asset {asset_id}: {safename} (label: {label})")
+
+    def add_file(
+        self,
+        source: Path,
+        original_filename: str,
+        label: Optional[str] = None,
+        sha256: Optional[str] = None,
+    ) -> Asset:
+        """Add a file to the asset registry.
+
+        Args:
+            source: Path to the source file to add
+            original_filename: Original name of the file
+            label: Optional label for categorization
+            sha256: Precomputed SHA-256 hex digest, e.g. hashed while the upload
+                was received; the file is re-read and hashed if omitted
+
+        Returns:
+            Asset object representing the added file
+
+        Raises:
+            ValueError: If filename is invalid
+            PermissionError: If path traversal is attempted
+        """
+        record = self._prepare(source, original_filename, label, sha256)
+        conn = self._connect()
+        with conn:
+            conn.execute(_INSERT, astuple(record))
+        log.info(f"Added asset {record.id}: {record.filename} (label: {label})")
         return record
 
+    def add_files(self, sources: Sequence[Tuple]) -> List[Asset]:
+        """Add several files to the asset registry in a single transaction.
+
+        Files are moved and hashed first; all records are then inserted with
+        one commit. Items that fail preparation are logged and skipped.
+
+        Args:
+            sources: Tuples of (source path, original filename, label) with an
+                optional fourth element holding a precomputed SHA-256 digest
+
+        Returns:
+            Asset objects for the files that were added, in input order
+        """
+        records: List[Asset] = []
+        for item in sources:
+            try:
+                records.append(self._prepare(*item))
+            except Exception as e:
+                log.error(f"Failed to add {item[1]}: {e}")
+        if records:
+            conn = self._connect()
+            with conn:
+                conn.executemany(_INSERT, [astuple(r) for r in records])
+            log.info(f"Added {len(records)} assets in one batch")
+        return records
+
     def resolve_path(self, asset: Asset) -> Path:
         """Resolve an asset to its absolute filesystem path.
 
@@ -279,4 +358,6 @@ class AssetRegistry:
 
 
 # Global registry instance
-registry = AssetRegistry(settings.REGISTRYFILE)
+registry = AssetRegistry(
+    settings.REGISTRYFILE, legacy_index_path=settings.REGISTRYPATH / "assetsindex.json"
+)
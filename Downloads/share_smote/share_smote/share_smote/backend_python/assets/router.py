@@ -3,14 +3,11 @@ import logging
 from typing import Annotated
 from fastapi import APIRouter, HTTPException, Security
 from fastapi.responses import FileResponse
-from fastapi.security import APIKeyHeader
 from assets.registry import registry
-from config import settings
 from auth import verify_api_key
 
 
 router = APIRouter(prefix="/assets", tags=["assets"])
-api_key_header = APIKeyHeader(name=settings.API_KEY_HEADER, auto_error=False)
 log = logging.getLogger(__name__)
 
 
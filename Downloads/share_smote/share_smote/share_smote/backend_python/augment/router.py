@@ -1,7 +1,13 @@
 from __future__ import annotations
 import logging
+import zipfile
+from pathlib import Path
 from typing import Annotated, List
-from fastapi import APIRouter, HTTPException, Security, Response
+import numpy as np
+import orjson
+from fastapi import APIRouter, HTTPException, Security
+from fastapi.responses import StreamingResponse
+from zipstream import ZipStream
 from augment.schemas import AugmentRequest, ImageInfo
 from augment.service import run_smote
 from assets.registry import registry
@@ -29,7 +35,7 @@ async def post_smote(
         key: API key for authentication (validated via Security dependency)
 
     Returns:
-        Response containing ZIP archive with augmented dataset and metadata
+        StreamingResponse yielding the ZIP archive with augmented dataset and metadata
 
     Raises:
         HTTPException: 404 if asset not found, 400 if asset missing label or no
@@ -76,11 +82,14 @@ async def post_smote(
     ]
 
     # Calculate class distribution statistics
-    from collections import Counter
-
-    original_counts = Counter(o.label for o in result.originals)
-    synthetic_counts = Counter(s.label for s in result.synthetics)
-    all_labels = set(original_counts.keys()) | set(synthetic_counts.keys())
+    o_uniq, o_cnt = np.unique(
+        np.array([o.label for o in result.originals], dtype=str), return_counts=True
+    )
+    s_uniq, s_cnt = np.unique(
+        np.array([s.label for s in result.synthetics], dtype=str), return_counts=True
+    )
+    original_counts = dict(zip(o_uniq.tolist(), o_cnt.tolist()))
+    synthetic_counts = dict(zip(s_uniq.tolist(), s_cnt.tolist()))
     classes = {
         label: {
             "original_count": original_counts.get(label, 0),
@@ -88,33 +97,29 @@ async def post_smote(
             "total_count": original_counts.get(label, 0)
             + synthetic_counts.get(label, 0),
         }
-        for label in sorted(all_labels)
+        for label in np.union1d(o_uniq, s_uniq).tolist()
     }
 
-    # Format quality metrics
+    # Stage quality metrics in arrays once for formatting and averaging
+    n_metrics = len(metrics_report.metrics)
+    cos_arr = np.fromiter(
+        (m.cossim for m in metrics_report.metrics), dtype=np.float64, count=n_metrics
+    )
+    ssim_arr = np.fromiter(
+        (m.ssim for m in metrics_report.metrics), dtype=np.float64, count=n_metrics
+    )
     quality_metrics = [
-        {
-            "synthetic_image": metric.synthpath.name,
-            "cosine_similarity": round(metric.cossim, 4),
-            "ssim": round(metric.ssim, 4),
-        }
-        for metric in metrics_report.metrics
+        {"synthetic_image": metric.synthpath.name, "cosine_similarity": c, "ssim": v}
+        for metric, c, v in zip(
+            metrics_report.metrics,
+            cos_arr.round(4).tolist(),
+            ssim_arr.round(4).tolist(),
+        )
     ]
 
     # Calculate average quality metrics
-    avg_cos = (
-        round(
-            sum(m["cosine_similarity"] for m in quality_metrics) / len(quality_metrics),
-            4,
-        )
-        if quality_metrics
-        else 0.0
-    )
-    avg_ssim = (
-        round(sum(m["ssim"] for m in quality_metrics) / len(quality_metrics), 4)
-        if quality_metrics
-        else 0.0
-    )
+    avg_cos = round(float(cos_arr.mean()), 4) if n_metrics else 0.0
+    avg_ssim = round(float(ssim_arr.mean()), 4) if n_metrics else 0.0
 
     # Build comprehensive metrics response
     metrics = {
@@ -131,52 +136,41 @@ async def post_smote(
         "metrics": metrics,
     }
 
-    # Create ZIP archive with augmented dataset
-    import zipfile
-    import io
-    import json
-    from pathlib import Path
-
-    log.info("Creating ZIP file with augmented dataset")
-    zip_buffer = io.BytesIO()
+    # Create ZIP archive with augmented dataset, streamed to the client
+    log.info("Creating ZIP stream with augmented dataset")
     try:
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Add metadata JSON
-            zipf.writestr(
-                "augmentation_metadata.json", json.dumps(response_json, indent=2)
-            )
-            log.info("Added metadata JSON to ZIP")
-
-            # Add original images organized by class
-            log.info("Adding original images to ZIP")
-            for orig_info in result.originals:
-                label = orig_info.label
-                orig_path = Path(orig_info.path)
-                if orig_path.exists():
-                    with open(orig_path, "rb") as f:
-                        zipf.writestr(f"{label}/{orig_path.name}", f.read())
-                    log.debug(f"Added original: {label}/{orig_path.name}")
-
-            # Add synthetic images organized by class
-            log.info("Adding synthetic images to ZIP")
-            for synth_info in result.synthetics:
-                label = synth_info.label
-                synth_path = Path(synth_info.path)
-                if synth_path.exists():
-                    with open(synth_path, "rb") as f:
-                        zipf.writestr(f"{label}/{synth_path.name}", f.read())
-                    log.debug(f"Added synthetic: {label}/{synth_path.name}")
-
-        zip_buffer.seek(0)
-        zip_bytes = zip_buffer.getvalue()
-        log.info(f"ZIP file created successfully, size: {len(zip_bytes)} bytes")
-
-        return Response(
-            content=zip_bytes,
+        # Images are already entropy-coded, so store them and only deflate the JSON
+        zs = ZipStream(compress_type=zipfile.ZIP_STORED)
+        # Add metadata JSON
+        zs.add(
+            orjson.dumps(response_json, option=orjson.OPT_INDENT_2),
+            "augmentation_metadata.json",
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+
+        # Add original images organized by class
+        for orig_info in result.originals:
+            label = orig_info.label
+            orig_path = Path(orig_info.path)
+            if orig_path.exists():
+                zs.add_path(orig_path, arcname=f"{label}/{orig_path.name}")
+                log.debug(f"Added original: {label}/{orig_path.name}")
+
+        # Add synthetic images organized by class
+        for synth_info in result.synthetics:
+            label = synth_info.label
+            synth_path = Path(synth_info.path)
+            if synth_path.exists():
+                zs.add_path(synth_path, arcname=f"{label}/{synth_path.name}")
+                log.debug(f"Added synthetic: {label}/{synth_path.name}")
+
+        log.info("ZIP stream prepared, streaming response to client")
+
+        return StreamingResponse(
+            zs,
             media_type="application/zip",
             headers={
                 "Content-Disposition": "attachment; filename=augmented_dataset.zip",
-                "Content-Type": "application/zip",
             },
         )
     except Exception as e:
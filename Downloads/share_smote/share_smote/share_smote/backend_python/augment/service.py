@@ -1,11 +1,15 @@
 from __future__ import annotations
+import os
 import uuid
 import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from collections import Counter
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import numpy as np
+import orjson
 from PIL import Image
-from imblearn.over_sampling import SMOTE
+from sklearn.neighbors import NearestNeighbors
 from .schemas import SyntheticImages, ParameterSet, ImageInfo, AugmentOptions
 from assets.registry import registry
 from config import settings
@@ -33,11 +37,15 @@ def _validate_image(im: Image.Image) -> None:
 
 
 def vec(img: Image.Image, target_size=(256, 256)) -> np.ndarray:
-    """Flatten a PIL Image into a 1D numpy array with consistent dimensions."""
-    # Resize image to consistent dimensions
-    img_resized = img.resize(target_size, Image.LANCZOS)
-    arr = np.asarray(img_resized)
-    return arr.reshape(-1).astype(np.float32)
+    """Flatten a PIL Image into a 1D float16 array with consistent dimensions.
+
+    float16 represents every 8-bit pixel value exactly, so SMOTE works on the
+    same values at half the memory of float32.
+    """
+    # Resize only when the caller has not already done so
+    if img.size != target_size:
+        img = img.resize(target_size, Image.LANCZOS)
+    return np.asarray(img, dtype=np.float16).reshape(-1)
 
 
 def mat(vec: np.ndarray, shape: tuple) -> Image.Image:
@@ -66,9 +74,7 @@ def load_params() -> ParameterSet:
         log.warning("SMOTE parameters not found, using defaults")
         return ParameterSet()
     try:
-        import json
-
-        data = json.loads(settings_path.read_text(encoding="utf-8"))
+        data = orjson.loads(settings_path.read_bytes())
         return ParameterSet(**data)
     except Exception as e:
         log.error(f"Failed to load parameters: {e}, using defaults")
@@ -104,6 +110,100 @@ def _compute_strategy(y: list[str], targetratio: float | None) -> dict[str, int]
     return {cls: target for cls, cnt in eligible.items() if cnt < target}
 
 
+def _load_into(info: ImageInfo, out: np.ndarray) -> bool:
+    """
+    Load an image, convert it to RGB and write its vector into a matrix row.
+
+    Args:
+        info: ImageInfo with the path of the image to load
+        out: Preallocated row of the feature matrix to fill
+
+    Returns:
+        True if the row was filled, False if the image was skipped
+    """
+    try:
+        with Image.open(info.path) as im:
+            _validate_image(im)
+            # Convert all images to RGB
+            if im.mode == "L":
+                im = im.convert("RGB")
+            elif im.mode == "RGBA":
+                background = Image.new("RGB", im.size, (255, 255, 255))
+                background.paste(im, mask=im.split()[3])
+                im = background
+            elif im.mode == "P":
+                im = im.convert("RGB")
+            elif im.mode != "RGB":
+                log.warning(
+                    f"Skipping image with unsupported mode {im.mode}: {info.path}"
+                )
+                return False
+            im_resized = im.resize(SIZE, Image.LANCZOS)
+            out[:] = vec(im_resized)
+            return True
+    except Exception as e:
+        log.warning(f"Failed to load image {info.path}: {e}")
+        return False
+
+
+def _interpolate(
+    Xc: np.ndarray, n_new: int, k: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Generate SMOTE samples for one class in a single vectorized pass.
+
+    Each new sample is a random point on the segment between a randomly chosen
+    class member and one of its k nearest neighbours within the class.
+
+    Args:
+        Xc: Feature rows belonging to a single class
+        n_new: Number of synthetic samples to generate
+        k: Number of nearest neighbours to interpolate towards
+        rng: Random generator used for base, neighbour and weight selection
+
+    Returns:
+        Array of shape (n_new, Xc.shape[1]) with the same dtype as Xc
+    """
+    nn = NearestNeighbors(n_neighbors=k, n_jobs=-1).fit(Xc.astype(np.float32))
+    # Querying without X excludes each sample from its own neighbour list
+    neigh = nn.kneighbors(return_distance=False)
+    base_idx = rng.integers(0, len(Xc), n_new)
+    nbr_idx = neigh[base_idx, rng.integers(0, k, n_new)]
+    w = rng.random((n_new, 1), dtype=np.float32)
+    base = Xc[base_idx].astype(np.float32)
+    return (base + w * (Xc[nbr_idx] - base)).astype(Xc.dtype)
+
+
+def _save_one(vec_row: np.ndarray, label: str) -> Optional[ImageInfo]:
+    """
+    Convert a synthetic vector back to an image and save it under its class folder.
+
+    Args:
+        vec_row: Flattened synthetic sample
+        label: Class label used for the output folder and filename
+
+    Returns:
+        ImageInfo for the saved file, or None if saving failed
+    """
+    shape = (SIZE[1], SIZE[0], 3)
+    try:
+        # Convert vector back to image; shape already matches SIZE
+        img = mat(vec_row, shape)
+        if img.size != SIZE:
+            img = img.resize(SIZE, Image.LANCZOS)
+
+        # Save synthetic image; level 1 trades ~10% size for faster encoding
+        fname = f"{uuid.uuid4().hex}-{label}.png"
+        savepath = settings.ASSETSPATH / "synthetic" / label
+        savepath.mkdir(parents=True, exist_ok=True)
+        full_path = savepath / fname
+        img.save(full_path, compress_level=1)
+        return ImageInfo(path=full_path, label=label)
+    except Exception as e:
+        log.error(f"Failed to save synthetic image: {e}")
+        return None
+
+
 def run_smote(originals: list[ImageInfo]) -> SyntheticImages:
     """
     Generate synthetic images using SMOTE to balance class distribution.
@@ -119,38 +219,18 @@ def run_smote(originals: list[ImageInfo]) -> SyntheticImages:
         SyntheticImages containing both original and synthetic image information
     """
     params = load_params()
-    X: list[np.ndarray] = []
-    y: list[str] = []
     target_width, target_height = SIZE
-
-    # Load and preprocess images
-    for info in originals:
-        try:
-            with Image.open(info.path) as im:
-                _validate_image(im)
-                # Convert all images to RGB
-                if im.mode == "L":
-                    im = im.convert("RGB")
-                elif im.mode == "RGBA":
-                    background = Image.new("RGB", im.size, (255, 255, 255))
-                    background.paste(im, mask=im.split()[3])
-                    im = background
-                elif im.mode == "P":
-                    im = im.convert("RGB")
-                elif im.mode != "RGB":
-                    log.warning(
-                        f"Skipping image with unsupported mode {im.mode}: {info.path}"
-                    )
-                    continue
-                im_resized = im.resize(SIZE, Image.LANCZOS)
-                X.append(vec(im_resized))
-                y.append(info.label)
-        except Exception as e:
-            log.warning(f"Failed to load image {info.path}: {e}")
-            continue
-
-    if not X:
+    # Preallocate the feature matrix; rows that fail to load are dropped afterwards
+    X = np.empty((len(originals), target_width * target_height * 3), dtype=np.float16)
+
+    # Load and preprocess images in parallel; PIL decode and resize release the GIL
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        loaded = list(ex.map(_load_into, originals, X))
+    y: list[str] = [info.label for info, ok in zip(originals, loaded) if ok]
+    if not y:
         return SyntheticImages(originals=originals, synthetics=[])
+    if len(y) < len(originals):
+        X = X[np.asarray(loaded)]
 
     from collections import Counter
 
@@ -169,42 +249,28 @@ def run_smote(originals: list[ImageInfo]) -> SyntheticImages:
     min_eligible = min(eligible_counts.values()) if eligible_counts else 0
     keff = max(1, min(int(params.kneighbors), max(1, min_eligible - 1)))
 
-    # Apply SMOTE
+    # Apply SMOTE per class
     try:
-        sm = SMOTE(
-            k_neighbors=keff,
-            sampling_strategy=strategy,
-            random_state=params.randomstate,
-        )
-        X_res, y_res = sm.fit_resample(np.array(X), np.array(y))
+        rng = np.random.default_rng(params.randomstate)
+        y_arr = np.asarray(y)
+        X_new: list[np.ndarray] = []
+        y_new: list[str] = []
+        for label in sorted(strategy):
+            Xc = X[y_arr == label]
+            n_new = strategy[label] - len(Xc)
+            X_new.append(_interpolate(Xc, n_new, keff, rng))
+            y_new.extend([label] * n_new)
     except Exception as e:
         log.error(f"SMOTE failed: {e}")
         return SyntheticImages(originals=originals, synthetics=[])
 
-    # Save synthetic images
-    synthetics: list[ImageInfo] = []
-    output_dir = settings.ASSETSPATH / "synthetic"
-    for vec_row, label in zip(X_res[len(X) :], y_res[len(y) :]):
-        shape = (SIZE[1], SIZE[0], 3)
-        try:
-            # Convert vector back to image
-            img = mat(vec_row, shape)
-
-            # Ensure image is exactly 256x256
-            img_resized = img.resize(SIZE, Image.LANCZOS)
-
-            # Save resized synthetic image
-            fname = f"{uuid.uuid4().hex}-{label}.png"
-            savepath = output_dir / label
-            savepath.mkdir(parents=True, exist_ok=True)
-            full_path = savepath / fname
-            img_resized.save(full_path)
-
-            # Track saved image
-            synthetics.append(ImageInfo(path=full_path, label=label))
-        except Exception as e:
-            log.error(f"Failed to save synthetic image: {e}")
-            continue
+    # Save synthetic images in parallel; PNG encoding releases the GIL
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        synthetics = [
+            info
+            for info in ex.map(_save_one, np.concatenate(X_new), y_new)
+            if info is not None
+        ]
 
     log.info(f"Generated {len(synthetics)} synthetic images")
     return SyntheticImages(originals=originals, synthetics=synthetics)
@@ -226,7 +292,8 @@ def augment_images(
     Returns:
         List of tuples containing (new_asset_id, new_filename) for each created asset
     """
-    created: List[Tuple[str, str]] = []
+    pending: List[Tuple[Path, str, Optional[str]]] = []
+    tmp_dir = settings.TMPPATH
     for asset_id in asset_ids:
         asset = registry.get_asset(asset_id)
         if not asset:
@@ -247,15 +314,11 @@ def augment_images(
                         augmented = augmented.transpose(Image.ROTATE_180)
                     elif options.rotate_deg == 270:
                         augmented = augmented.transpose(Image.ROTATE_90)
-                # Save augmented image as new asset
-                tmp_dir = settings.DATAPATH / "tmp"
-                tmp_dir.mkdir(parents=True, exist_ok=True)
+                # Save augmented image; registered with the rest of the batch below
                 tmp_path = tmp_dir / f"aug_{uuid.uuid4().hex}.png"
                 augmented.save(tmp_path)
-                new_filename = f"aug_{asset.filename}"
-                new_asset = registry.add_file(tmp_path, original_filename=new_filename)
-                created.append((new_asset.id, new_asset.filename))
+                pending.append((tmp_path, f"aug_{asset.filename}", None))
         except Exception as e:
             log.error(f"Failed to augment {asset_id}: {e}")
             continue
-    return created
+    return [(a.id, a.filename) for a in registry.add_files(pending)]
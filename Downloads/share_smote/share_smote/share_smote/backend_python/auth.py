@@ -1,3 +1,4 @@
+import hmac
 import logging
 from fastapi.security import APIKeyHeader
 from fastapi import HTTPException, Security
@@ -29,8 +30,14 @@ async def verify_api_key(api_key: str = Security(api_key_header)):
     if not settings.REQUIRE_AUTH:
         return api_key
 
-    # Validate API key against authorized list
-    if api_key not in settings.VALID_API_KEYS:
+    # Compare against every configured key in constant time so response timing
+    # does not reveal how much of a guessed key matched
+    matched = False
+    if api_key is not None:
+        candidate = api_key.encode()
+        for valid_key in settings.VALID_API_KEYS:
+            matched |= hmac.compare_digest(candidate, valid_key.encode())
+    if not matched:
         log.warning("Invalid API key attempt detected")
         raise HTTPException(status_code=403, detail="Invalid API key")
 
@@ -1,25 +1,62 @@
 from __future__ import annotations
+import os
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Set
+from typing import FrozenSet, List, Set
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
 
 
+# Pillow format names matching ALLOWEDIMAGEEXTS; passed to Image.open so only
+# these decoders are probed
+IMAGE_FORMATS = ("JPEG", "PNG", "WEBP")
+
+# Directories already created by this process
+_ENSURED: Set[Path] = set()
+
+
+def _ensure(p: Path) -> Path:
+    """
+    Create a directory once per process, skipping the mkdir on later calls.
+
+    Args:
+        p: Directory path to create
+
+    Returns:
+        The same path, guaranteed to exist
+    """
+    if p not in _ENSURED:
+        if not os.access(p, os.F_OK):
+            p.mkdir(parents=True, exist_ok=True)
+        _ENSURED.add(p)
+    return p
+
+
 class Settings(BaseSettings):
     """
     Application configuration settings loaded from environment variables and .env file.
 
     Manages all configuration parameters including paths, security settings, upload limits,
-    and CORS configuration. Settings are validated on initialization and provide computed
-    properties for derived paths.
+    and CORS configuration. Settings are validated on initialization, immutable afterwards,
+    and provide cached computed properties for derived paths. Directories are created
+    by ensure_dirs() at startup rather than during validation.
     """
 
-    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
+    # Production deployments configure everything through the OS environment,
+    # so the .env file is only parsed when ENV is not exported as production
+    model_config = SettingsConfigDict(
+        env_file=None if os.getenv("ENV") == "production" else ".env",
+        env_file_encoding="utf-8",
+        frozen=True,
+    )
 
     # Application settings
     APPNAME: str = "image-service"
     ENV: str = Field(default="production")
     DATADIR: Path = Field(default=Path(".data"))
+    # Set when running a single worker process; allows in-process locks
+    # in place of file locks
+    SINGLE_PROCESS: bool = False
 
     # Security and CORS settings
     ALLOWEDHOSTS: List[str] = Field(default_factory=list)
@@ -53,7 +90,7 @@ class Settings(BaseSettings):
     # Directory and file names
     ASSETSDIRNAME: str = "assets"
     REGISTRYDIRNAME: str = "registry"
-    REGISTRYFILENAME: str = "assetsindex.json"
+    REGISTRYFILENAME: str = "assetsindex.db"
     PARAMSFILENAME: str = "settings.json"
 
     # Logging configuration
@@ -63,26 +100,19 @@ class Settings(BaseSettings):
     SECRET_KEY: str = Field(default="CHANGE_THIS_IN_PRODUCTION_USE_ENV_VAR")
     API_KEY_HEADER: str = "X-API-Key"
     REQUIRE_AUTH: bool = Field(default=True)
-    VALID_API_KEYS: Set[str] = Field(default_factory=set)
+    VALID_API_KEYS: FrozenSet[str] = Field(default_factory=frozenset)
 
-    @field_validator("DATADIR", mode="before")
-    @classmethod
-    def ensure_datadir(cls, v):
+    def ensure_dirs(self) -> None:
         """
-        Ensure data directory and temporary subdirectory exist.
+        Create the data directory and its standard subdirectories.
 
-        Args:
-            v: Path value from configuration
-
-        Returns:
-            Validated Path object with directories created
+        Called once at application startup rather than on every Settings
+        construction.
         """
-        p = Path(v) if not isinstance(v, Path) else v
-        p.mkdir(parents=True, exist_ok=True)
-        (p / "tmp").mkdir(parents=True, exist_ok=True)
-        return p
+        _ensure(self.DATAPATH)
+        _ = self.TMPPATH, self.ASSETSPATH, self.REGISTRYPATH
 
-    @property
+    @cached_property
     def DATAPATH(self) -> Path:
         """
         Get absolute path to data directory.
@@ -92,7 +122,17 @@ class Settings(BaseSettings):
         """
         return Path(self.DATADIR).resolve()
 
-    @property
+    @cached_property
+    def TMPPATH(self) -> Path:
+        """
+        Get path to the scratch directory for uploads, creating it if necessary.
+
+        Returns:
+            Path to temporary directory
+        """
+        return _ensure(self.DATAPATH / "tmp")
+
+    @cached_property
     def ASSETSPATH(self) -> Path:
         """
         Get path to assets directory, creating it if necessary.
@@ -100,11 +140,9 @@ class Settings(BaseSettings):
         Returns:
             Path to assets directory
         """
-        p = self.DATAPATH / self.ASSETSDIRNAME
-        p.mkdir(parents=True, exist_ok=True)
-        return p
+        return _ensure(self.DATAPATH / self.ASSETSDIRNAME)
 
-    @property
+    @cached_property
     def REGISTRYPATH(self) -> Path:
         """
         Get path to registry directory, creating it if necessary.
@@ -112,21 +150,19 @@ class Settings(BaseSettings):
         Returns:
             Path to registry directory
         """
-        p = self.DATAPATH / self.REGISTRYDIRNAME
-        p.mkdir(parents=True, exist_ok=True)
-        return p
+        return _ensure(self.DATAPATH / self.REGISTRYDIRNAME)
 
-    @property
+    @cached_property
     def REGISTRYFILE(self) -> Path:
         """
-        Get path to asset registry index file.
+        Get path to asset registry database file.
 
         Returns:
-            Path to assets index JSON file
+            Path to assets index SQLite database
         """
         return self.REGISTRYPATH / self.REGISTRYFILENAME
 
-    @property
+    @cached_property
     def PARAMSFILE(self) -> Path:
         """
         Get path to SMOTE parameters file.
@@ -207,7 +243,7 @@ class Settings(BaseSettings):
         Validate that API keys are configured when authentication is required.
 
         Args:
-            v: Set of valid API keys
+            v: Frozen set of valid API keys
             info: Validation context containing other field values
 
         Returns:
@@ -225,5 +261,16 @@ class Settings(BaseSettings):
         return v
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Build the application settings once per process.
+
+    Returns:
+        Cached Settings instance
+    """
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -1,6 +1,30 @@
+import atexit
 import logging
 import logging.config
+import queue
 import sys
+from logging.handlers import QueueListener
+from typing import Optional
+
+
+STANDARD_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+# Background listener draining queued records to the log file
+_listener: Optional[QueueListener] = None
+
+
+def _stop_listener() -> None:
+    """Flush queued records and close the file handler of the active listener."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(_stop_listener)
 
 
 def configure_logging(level: str = "INFO", log_file: str = "app.log") -> None:
@@ -9,12 +33,20 @@ def configure_logging(level: str = "INFO", log_file: str = "app.log") -> None:
 
     Sets up structured logging with separate formatters for standard application
     logs and uvicorn server logs. Logs are written to both stdout and a file,
-    with color-coded output for uvicorn logs in the console.
+    with color-coded output for uvicorn logs in the console. File writes are
+    handed to a queue and performed by a background QueueListener thread, so
+    request handlers never block on disk I/O.
 
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL). Defaults to "INFO"
         log_file: Path to log file for persistent storage. Defaults to "app.log"
     """
+    global _listener
+    _stop_listener()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(log_file, mode="a")
+    file_handler.setFormatter(logging.Formatter(STANDARD_FORMAT))
+
     logging.config.dictConfig(
         {
             "version": 1,
@@ -22,7 +54,7 @@ def configure_logging(level: str = "INFO", log_file: str = "app.log") -> None:
             "formatters": {
                 # Standard formatter for application logs
                 "standard": {
-                    "format": "%(asctime)s %(levelname)s %(name)s %(message)s",
+                    "format": STANDARD_FORMAT,
                 },
                 # Uvicorn-specific formatter with color support
                 "uvicorn": {
@@ -39,12 +71,10 @@ def configure_logging(level: str = "INFO", log_file: str = "app.log") -> None:
                     "formatter": "standard",
                     "stream": sys.stdout,
                 },
-                # File handler for persistent logging
+                # Queue handler feeding the background file writer
                 "file": {
-                    "class": "logging.FileHandler",
-                    "formatter": "standard",
-                    "filename": log_file,
-                    "mode": "a",
+                    "()": "logging.handlers.QueueHandler",
+                    "queue": log_queue,
                 },
                 # Console handler for uvicorn logs with color
                 "uvicorn": {
@@ -73,3 +103,6 @@ def configure_logging(level: str = "INFO", log_file: str = "app.log") -> None:
             },
         }
     )
+
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
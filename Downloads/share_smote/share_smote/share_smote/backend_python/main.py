@@ -1,6 +1,8 @@
 from __future__ import annotations
 import logging
-import uuid
+import os
+import re
+from typing import List, Optional, Tuple
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
@@ -13,78 +15,99 @@ from upload.router import router as upload_router
 from augment.router import router as augment_router
 from metrics.router import router as metrics_router
 from params.router import router as params_router
+from assets.registry import registry
 from config import settings
 from logger.logging_config import configure_logging
 
 
-# Initialize logging and rate limiter
+# Create data directories, then initialize logging and rate limiter
+settings.ensure_dirs()
 configure_logging(settings.LOGLEVEL)
 log = logging.getLogger("app")
 limiter = Limiter(key_func=get_remote_address)
 
+# Static health payload, built once at import
+_HEALTH_OK = {"status": "ok", "app": settings.APPNAME}
+
 # Initialize FastAPI application
 app = FastAPI(title=settings.APPNAME)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 
+# Security headers attached to every response, pre-encoded as raw ASGI pairs
+_STATIC_SEC_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"content-security-policy", b"default-src 'self'"),
+]
+
+
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
     """
-    Add security headers to all HTTP responses.
+    Add security headers and a unique request ID to all HTTP responses.
 
     Implements defense-in-depth security measures including XSS protection,
     clickjacking prevention, content type sniffing protection, and HTTPS enforcement.
+    Also generates a random 128-bit hex identifier for each request and includes it
+    in the response headers to enable request tracking across the application stack.
+    Both are handled in one middleware to avoid an extra call_next hop per request.
 
     Args:
         request: Incoming HTTP request
         call_next: Next middleware or route handler in the chain
 
     Returns:
-        Response with added security headers
+        Response with security and X-Request-ID headers
     """
+    request_id = os.urandom(16).hex()
+    request.state.request_id = request_id
     response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = (
-        "max-age=31536000; includeSubDomains"
-    )
-    response.headers["Content-Security-Policy"] = "default-src 'self'"
+    # Append directly to the raw header list; these names are never set upstream
+    response.raw_headers.extend(_STATIC_SEC_HEADERS)
+    response.raw_headers.append((b"x-request-id", request_id.encode("latin-1")))
     return response
 
 
-@app.middleware("http")
-async def add_request_id(request: Request, call_next):
+# Configure host validation middleware if allowed hosts are specified
+if settings.ALLOWEDHOSTS:
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWEDHOSTS)
+
+
+def _split_cors_origins(origins: List[str]) -> Tuple[List[str], Optional[str]]:
     """
-    Add unique request ID to each request for tracing and logging.
+    Separate literal CORS origins from wildcard patterns.
 
-    Generates a UUID for each request and includes it in the response headers
-    to enable request tracking across the application stack.
+    Literal origins (and the bare "*") are matched by set lookup inside
+    CORSMiddleware; patterns such as "https://*.example.com" are folded into a
+    single regex that the middleware compiles once at startup.
 
     Args:
-        request: Incoming HTTP request
-        call_next: Next middleware or route handler in the chain
+        origins: Configured CORS origins
 
     Returns:
-        Response with X-Request-ID header
+        Tuple of (literal origins, combined origin regex or None)
     """
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
+    literal = [o for o in origins if o == "*" or "*" not in o]
+    patterns = [
+        re.escape(o).replace(r"\*", r"[A-Za-z0-9.-]+")
+        for o in origins
+        if o != "*" and "*" in o
+    ]
+    regex = f"^(?:{'|'.join(patterns)})$" if patterns else None
+    return literal, regex
 
 
-# Configure host validation middleware if allowed hosts are specified
-if settings.ALLOWEDHOSTS:
-    app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWEDHOSTS)
-
 # Configure CORS middleware if origins are specified
 if settings.CORSORIGINS:
+    cors_origins, cors_origin_regex = _split_cors_origins(settings.CORSORIGINS)
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.CORSORIGINS,
+        allow_origins=cors_origins,
+        allow_origin_regex=cors_origin_regex,
         allow_credentials=settings.CORSALLOWCREDENTIALS,
         allow_methods=settings.CORSALLOWMETHODS,
         allow_headers=settings.CORSALLOWHEADERS,
@@ -125,7 +148,7 @@ def health(request: Request) -> dict:
     Returns:
         Dictionary with status and application name
     """
-    return {"status": "ok", "app": settings.APPNAME}
+    return dict(_HEALTH_OK)
 
 
 @app.get("/ready")
@@ -143,8 +166,6 @@ def ready(request: Request) -> JSONResponse:
     Returns:
         JSONResponse with status 200 if ready, 503 if not ready
     """
-    from assets.registry import registry
-
     try:
         # Test registry accessibility
         _ = registry.list_assets()
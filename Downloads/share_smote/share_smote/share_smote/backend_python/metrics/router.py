@@ -1,24 +1,12 @@
 from __future__ import annotations
-from typing import Annotated, List
+from typing import Annotated
 from fastapi import APIRouter, Security
-from fastapi.security import APIKeyHeader
-from pydantic import BaseModel, Field
-from metrics.schemas import MetricsResult
+from metrics.schemas import MetricsRequest, MetricsResult
 from metrics.service import compute_basic_metrics
-from config import settings
 from auth import verify_api_key
 
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
-api_key_header = APIKeyHeader(name=settings.API_KEY_HEADER, auto_error=False)
-
-
-class MetricsRequest(BaseModel):
-    """Request model for computing image metrics."""
-
-    asset_ids: List[str] = Field(
-        ..., min_items=1, description="List of asset IDs to analyze"
-    )
 
 
 @router.post("/basic", response_model=MetricsResult)
@@ -1,11 +1,21 @@
 from __future__ import annotations
 from typing import Dict, List
 from pathlib import Path
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from augment.schemas import ImageInfo, SyntheticImages
 
 
+class MetricsRequest(BaseModel):
+    """Request model for computing image metrics."""
+
+    asset_ids: List[str] = Field(
+        ..., min_length=1, description="List of asset IDs to analyze"
+    )
+
+
 class ImageMetrics(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     asset_id: str
     width: int
     height: int
@@ -20,6 +30,8 @@ class MetricsResult(BaseModel):
 
 
 class Metric(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     synthpath: Path
     cossim: float
     ssim: float
@@ -1,31 +1,84 @@
 from __future__ import annotations
-from typing import List, Dict, Tuple
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import logging
+from pathlib import Path
+import cv2
 import numpy as np
 from PIL import Image
-from sklearn.metrics.pairwise import cosine_similarity
 from skimage.metrics import structural_similarity as ssim
 from .schemas import ImageInfo, SyntheticImages, MetricsReport, Metric, ImageMetrics
 from assets.registry import registry
+from config import IMAGE_FORMATS
 
 
 log = logging.getLogger(__name__)
 
 
-def _vec(img: Image.Image, target_size=(256, 256)) -> np.ndarray:
+def _vec(arr: np.ndarray) -> np.ndarray:
     """
-    Flatten a PIL Image into a 1D numpy array.
+    Flatten an already-resized image array into a 1D numpy array.
 
     Args:
-        img: PIL Image to vectorize
+        arr: Image array of shape (256, 256, 3)
 
     Returns:
         Flattened numpy array of float32 pixel values
     """
-    # Resize image to consistent dimensions
-    img_resized = img.resize(target_size, Image.LANCZOS)
-    arr = np.asarray(img_resized)
-    return arr.reshape(-1).astype(np.float32)
+    return arr.reshape(-1).astype(np.float32, copy=False)
+
+
+def _load_rgb256(path: Path) -> np.ndarray:
+    """
+    Load an image as RGB and resize it to 256x256 with OpenCV area interpolation.
+
+    Args:
+        path: Path to the image file
+
+    Returns:
+        uint8 array of shape (256, 256, 3)
+    """
+    with Image.open(path) as im:
+        arr = np.asarray(im.convert("RGB"))
+    if arr.shape[:2] != (256, 256):
+        arr = cv2.resize(arr, (256, 256), interpolation=cv2.INTER_AREA)
+    return arr
+
+
+def _gray(arr: np.ndarray) -> np.ndarray:
+    """
+    Convert an RGB image array to single-channel luma.
+
+    Args:
+        arr: uint8 array of shape (256, 256, 3)
+
+    Returns:
+        uint8 array of shape (256, 256)
+    """
+    return cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+
+
+def _ssim_gray(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Compute Gaussian-weighted SSIM between two uint8 grayscale images.
+
+    Args:
+        a: First grayscale image
+        b: Second grayscale image
+
+    Returns:
+        SSIM score
+    """
+    return float(
+        ssim(
+            a,
+            b,
+            data_range=255,
+            gaussian_weights=True,
+            use_sample_covariance=False,
+        )
+    )
 
 
 def compute_quality_metrics(data: SyntheticImages) -> MetricsReport:
@@ -35,7 +88,7 @@ def compute_quality_metrics(data: SyntheticImages) -> MetricsReport:
     Calculates cosine similarity and SSIM (Structural Similarity Index) for each
     synthetic image by comparing it to the most similar original image of the same
     class. Uses cosine similarity to find the best matching original, then computes
-    SSIM for structural comparison.
+    SSIM on the grayscale images for structural comparison.
 
     Args:
         data: SyntheticImages containing original and synthetic image information
@@ -43,58 +96,63 @@ def compute_quality_metrics(data: SyntheticImages) -> MetricsReport:
     Returns:
         MetricsReport containing quality metrics for each synthetic image
     """
-    # Load and organize original images by label
-    by_label: dict[str, list[tuple[ImageInfo, np.ndarray, np.ndarray]]] = {}
+    # Load originals by label, keeping vectors and grayscale arrays as parallel lists
+    staged: dict[str, tuple[list[np.ndarray], list[np.ndarray]]] = {}
     for o in data.originals:
         try:
-            with Image.open(o.path) as oi:
-                oi_resized = oi.resize((256, 256), Image.LANCZOS)  # Resize to 256x256
-                o_arr = np.asarray(oi_resized) 
-                by_label.setdefault(o.label, []).append((o, _vec(oi), o_arr))
+            o_arr = _load_rgb256(o.path)
         except Exception as e:
             log.warning(f"Failed to load original image {o.path}: {e}")
             continue
-
-    results: list[Metric] = []
-    # Compare each synthetic to originals of same class
-    for s in data.synthetics:
-        originals = by_label.get(s.label, [])
-        if not originals:
+        vecs, arrs = staged.setdefault(o.label, ([], []))
+        vecs.append(_vec(o_arr))
+        arrs.append(_gray(o_arr))
+
+    # Stack each label's originals into one L2-normalized matrix
+    by_label: dict[str, tuple[np.ndarray, list[np.ndarray]]] = {}
+    for label, (vecs, arrs) in staged.items():
+        O = np.stack(vecs)
+        norms = np.linalg.norm(O, axis=1)
+        norms[norms == 0] = 1.0
+        by_label[label] = (O / norms[:, None], arrs)
+
+    def process_one(s: ImageInfo) -> Optional[Metric]:
+        """Score one synthetic against the originals of its class."""
+        if s.label not in by_label:
             log.debug(f"No originals found for label {s.label}")
-            continue
+            return None
+        O_norm, arrs = by_label[s.label]
 
         # Load synthetic image
         try:
-            with Image.open(s.path) as si:
-                si_resized = si.resize((256, 256), Image.LANCZOS)
-                s_arr = np.asarray(si_resized)
-                s_vec = _vec(si_resized)
+            s_arr = _load_rgb256(s.path)
+            s_vec = _vec(s_arr)
+            s_gray = _gray(s_arr)
         except Exception as e:
             log.warning(f"Failed to load synthetic image {s.path}: {e}")
-            continue
+            return None
 
-        # Find best matching original using cosine similarity
-        best_cos = -1.0
-        best_o_arr = None
-        for _, o_vec, o_arr in originals:
-            try:
-                cos = float(cosine_similarity(s_vec[None, :], o_vec[None, :])[0, 0])
-                if cos > best_cos:
-                    best_cos = cos
-                    best_o_arr = o_arr
-            except Exception as e:
-                log.warning(f"Failed to compute similarity: {e}")
-                continue
+        # Find best matching original with one matrix-vector product
+        s_norm = np.linalg.norm(s_vec) or 1.0
+        sims = O_norm @ (s_vec / s_norm)
+        idx = int(sims.argmax())
+        best_cos = float(sims[idx])
+        best_o_gray = arrs[idx]
 
         # Compute SSIM with best matching original
         ssim_val = 0.0
-        if best_o_arr is not None:
-            try:
-                ssim_val = float(ssim(s_arr, best_o_arr, channel_axis=2))
-            except Exception as e:
-                log.warning(f"Failed to compute SSIM: {e}")
+        try:
+            ssim_val = _ssim_gray(s_gray, best_o_gray)
+        except Exception as e:
+            log.warning(f"Failed to compute SSIM: {e}")
+
+        # Values are already typed, so skip pydantic validation
+        return Metric.model_construct(synthpath=s.path, cossim=best_cos, ssim=ssim_val)
 
-        results.append(Metric(synthpath=s.path, cossim=best_cos, ssim=ssim_val))
+    # Compare each synthetic to originals of same class; decoding and the
+    # NumPy/scikit-image kernels release the GIL, so threads scale with cores
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        results = [m for m in ex.map(process_one, data.synthetics) if m is not None]
 
     return MetricsReport(metrics=results)
 
@@ -117,18 +175,23 @@ def compute_basic_metrics(
         - Dictionary with summary statistics (averages and totals)
     """
     items: List[ImageMetrics] = []
+    # Running totals, accumulated while building items
+    sum_width = sum_height = sum_size = 0
 
-    # Compute metrics for each asset
+    # Fetch all requested records in one batch, then compute metrics in order
+    assets = registry.get_many(asset_ids)
     for asset_id in asset_ids:
-        asset = registry.get_asset(asset_id)
+        asset = assets.get(asset_id)
         if not asset:
             log.warning(f"Asset not found: {asset_id}")
             continue
 
         try:
             path = registry.resolve_path(asset)
-            with Image.open(path) as img:
-                metrics = ImageMetrics(
+            # Image.open only parses the header; pixel data is never decoded here
+            with Image.open(path, formats=IMAGE_FORMATS) as img:
+                # Fields come straight from PIL and the registry; skip validation
+                metrics = ImageMetrics.model_construct(
                     asset_id=asset_id,
                     width=img.width,
                     height=img.height,
@@ -136,17 +199,21 @@ def compute_basic_metrics(
                     file_size=asset.size,
                 )
                 items.append(metrics)
+                sum_width += metrics.width
+                sum_height += metrics.height
+                sum_size += metrics.file_size
         except Exception as e:
             log.error(f"Failed to compute metrics for {asset_id}: {e}")
             continue
 
     # Calculate summary statistics
-    if items:
+    n = len(items)
+    if n:
         summary = {
-            "avg_width": sum(m.width for m in items) / len(items),
-            "avg_height": sum(m.height for m in items) / len(items),
-            "avg_file_size": sum(m.file_size for m in items) / len(items),
-            "total_size": sum(m.file_size for m in items),
+            "avg_width": sum_width / n,
+            "avg_height": sum_height / n,
+            "avg_file_size": sum_size / n,
+            "total_size": sum_size,
         }
     else:
         summary = {
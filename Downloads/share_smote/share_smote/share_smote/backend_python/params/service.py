@@ -1,8 +1,10 @@
 from __future__ import annotations
-import json
+import copy
 import os
 import tempfile
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, Optional, Tuple
+import orjson
 from filelock import FileLock
 from config import settings
 
@@ -14,10 +16,39 @@ class ParamsStore:
     """Thread-safe storage for SMOTE parameters with JSON persistence."""
 
     def __init__(self) -> None:
-        """Initialize the parameters store and ensure parent directories exist."""
+        """
+        Initialize the parameters store and ensure parent directories exist.
+
+        A cross-process file lock is used unless SINGLE_PROCESS is set, in
+        which case an in-process lock suffices; os.replace keeps writes atomic
+        either way.
+        """
         self.path = settings.PARAMSFILE
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.lock = FileLock(str(self.path.with_suffix(".lock")))
+        if settings.SINGLE_PROCESS:
+            self.lock = threading.Lock()
+        else:
+            self.lock = FileLock(str(self.path.with_suffix(".lock")))
+        # (st_ino, st_mtime_ns, st_size, payload) of the last file contents
+        # seen; os.replace gives every write a new inode, so the inode catches
+        # same-size rewrites within one coarse mtime tick
+        self._cache: Optional[Tuple[int, int, int, Dict[str, Any]]] = None
+
+    def _remember(self, payload: Dict[str, Any]) -> None:
+        """
+        Cache a payload against the current on-disk file signature.
+
+        This method assumes the caller has already acquired the lock.
+
+        Args:
+            payload: Dictionary matching the current file contents
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._cache = None
+            return
+        self._cache = (st.st_ino, st.st_mtime_ns, st.st_size, payload)
 
     def _read_unlocked(self) -> Dict[str, Any]:
         """
@@ -30,8 +61,8 @@ class ParamsStore:
         """
         if not self.path.exists():
             return {}
-        with self.path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        with self.path.open("rb") as f:
+            return orjson.loads(f.read())
 
     def _atomic_write_unlocked(self, payload: Dict[str, Any]) -> None:
         """
@@ -44,9 +75,13 @@ class ParamsStore:
             payload: Dictionary of parameters to write
         """
         with tempfile.NamedTemporaryFile(
-            "w", delete=False, dir=str(self.path.parent), encoding="utf-8"
+            "wb", delete=False, dir=str(self.path.parent)
         ) as tmp:
-            json.dump(payload, tmp, ensure_ascii=False, indent=2)
+            tmp.write(
+                orjson.dumps(
+                    payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                )
+            )
             tmp.flush()
             os.fsync(tmp.fileno())
             tmp_name = tmp.name
@@ -56,11 +91,24 @@ class ParamsStore:
         """
         Retrieve current parameters in a thread-safe manner.
 
+        The parsed file is cached by inode, modification time and size, so
+        repeated reads of an unchanged file skip both the lock and the JSON
+        parse.
+
         Returns:
             Dictionary containing current parameter values
         """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return {}
+        cached = self._cache
+        if cached and cached[:3] == (st.st_ino, st.st_mtime_ns, st.st_size):
+            return copy.copy(cached[3])
         with self.lock:
-            return self._read_unlocked()
+            payload = self._read_unlocked()
+            self._remember(payload)
+            return copy.copy(payload)
 
     def set(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -74,6 +122,7 @@ class ParamsStore:
         """
         with self.lock:
             self._atomic_write_unlocked(data)
+            self._remember(copy.copy(data))
             return data
 
 
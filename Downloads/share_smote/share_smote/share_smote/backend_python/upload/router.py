@@ -1,15 +1,13 @@
 from __future__ import annotations
 from typing import Annotated, List
 from fastapi import APIRouter, File, Security, UploadFile
-from fastapi.security import APIKeyHeader
-from config import settings
+from fastapi.concurrency import run_in_threadpool
 from upload.schemas import UploadResult, AssetOut
 from upload.service import ingest_zip
 from auth import verify_api_key
 
 
 router = APIRouter(prefix="/upload", tags=["upload"])
-api_key_header = APIKeyHeader(name=settings.API_KEY_HEADER, auto_error=False)
 
 
 class UploadResponse(UploadResult):
@@ -36,7 +34,8 @@ async def upload_zip(
     Returns:
         UploadResult containing count and list of created assets with metadata
     """
-    created = ingest_zip(file)
+    # Extraction, hashing and file moves block, so keep them off the event loop
+    created = await run_in_threadpool(ingest_zip, file)
     assets: List[AssetOut] = []
     for asset_id, filename, label in created:
         assets.append(
@@ -1,24 +1,42 @@
 from __future__ import annotations
+import hashlib
 import io
 import os
-import tempfile
+import struct
+import uuid
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import BinaryIO, List, Optional, Tuple
 import logging
 from fastapi import HTTPException, UploadFile
 from PIL import Image
 from assets.registry import registry
-from config import settings
+from config import IMAGE_FORMATS, settings
 
 
 log = logging.getLogger(__name__)
-# Maximum image dimension and pixel limits
-MAX_IMAGE_DIMENSION = 10000
-MAX_IMAGE_PIXELS = 50_000_000
+# Image dimension and pixel limits
 MINIMUM_IMAGE_RESOLUTION = settings.MINIMUM_IMAGE_RESOLUTION
 MAXIMUM_IMAGE_DIMENSION = settings.MAXIMUM_IMAGE_DIMENSION
 MAXIMUM_IMAGE_PIXELS = settings.MAXIMUM_IMAGE_PIXELS
+MAXIMUM_FILE_BYTES = settings.UPLOAD_MAX_FILE_MB * 1024 * 1024
+# Member-name patterns that need the full normpath-based check
+_UNSAFE_PREFIXES = ("/", "\\", "..")
+_UNSAFE_SUFFIXES = ("/", "/.", "/..")
+_UNSAFE_SUBSTRINGS = ("//", "./")
+# Lower-cased allowed extensions, including the leading dot
+_ALLOWED_EXTS = frozenset(e.lower() for e in settings.ALLOWEDIMAGEEXTS)
+# Chunk size used when streaming ZIP members to disk
+COPY_BUFSIZE = 128 * 1024
+# Read buffer placed in front of the uploaded archive
+ZIP_READ_BUFSIZE = COPY_BUFSIZE
+# End-of-central-directory signature and the furthest it can sit from the end
+# of the archive (22-byte record plus a comment of up to 65535 bytes)
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_EOCD_MAX_SEARCH = 22 + 0xFFFF
+# Threads used to extract and validate ZIP members concurrently
+INGEST_WORKERS = min(8, os.cpu_count() or 1)
 
 
 def is_allowed_image(filename: str) -> bool:
@@ -31,99 +49,281 @@ def is_allowed_image(filename: str) -> bool:
     Returns:
         True if extension is in allowed list, False otherwise
     """
-    ext = Path(filename).suffix.lower()
-    return ext in settings.ALLOWEDIMAGEEXTS
+    # Same semantics as Path.suffix: a leading dot alone is not an extension
+    i = filename.rfind(".")
+    return i > 0 and filename[i:].lower() in _ALLOWED_EXTS
 
 
-def validate_and_save_temp(img_bytes: bytes, original_filename: str) -> Path:
+def _discard(path: Path) -> None:
     """
-    Validate image data and save to temporary file.
+    Remove a temporary file, ignoring errors.
 
-    Performs comprehensive validation including format verification, dimension checks,
-    and resolution limits. Protects against corrupted images and potential attacks.
+    Args:
+        path: Path of the file to remove
+    """
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def save_stream_temp(src: BinaryIO, dest: Path, head: bytes = b"") -> str:
+    """
+    Stream data into a new temporary file, hashing it on the way.
+
+    Copies in fixed-size chunks so peak memory stays at one buffer regardless
+    of member size. The source is expected to enforce its own length limit;
+    ZipExtFile stops at the member's declared uncompressed size.
 
     Args:
-        img_bytes: Raw image data bytes
-        original_filename: Original filename for error reporting
+        src: Readable binary stream, e.g. an open ZIP member
+        dest: Path of the temporary file; it must not exist yet
+        head: Bytes already read from the start of src, written first
 
     Returns:
-        Path to saved temporary file
+        SHA-256 hex digest of the written content
 
     Raises:
-        HTTPException: 400 for invalid/corrupted images or unsupported formats,
-                      413 for images exceeding size limits,
-                      500 for file system errors
+        HTTPException: 500 for file system errors
     """
     try:
-        # Verify image integrity
-        with Image.open(io.BytesIO(img_bytes)) as im:
-            im.verify()
+        # Names are unique per upload, so one exclusive create replaces
+        # mkstemp's random-name retry loop
+        fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except OSError as e:
+        log.error(f"Failed to create temp file {dest}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to save file")
+    h = hashlib.sha256(head)
+    try:
+        # No fsync: temp files are registered in one batch after the whole
+        # archive is processed, and a crash before that leaves no registry
+        # row referencing them
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(head)
+            while chunk := src.read(COPY_BUFSIZE):
+                h.update(chunk)
+                tmp.write(chunk)
+        return h.hexdigest()
+    except Exception as e:
+        _discard(dest)
+        log.error(f"Failed to write temp file {dest}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to save file")
 
-        # Check format and dimensions
-        with Image.open(io.BytesIO(img_bytes)) as im:
-            if im.format and im.format.lower() not in ("jpeg", "jpg", "png", "webp"):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported image format for {original_filename}: {im.format}",
-                )
 
-            width, height = im.size
+def peek_dimensions(head: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read image dimensions from the leading bytes of a PNG, JPEG or WebP file.
 
-            # Validate maximum dimensions
-            if width > MAXIMUM_IMAGE_DIMENSION or height > MAXIMUM_IMAGE_DIMENSION:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"Image dimensions too large ({width}x{height}). "
-                    f"Maximum dimension: {MAXIMUM_IMAGE_DIMENSION}px",
-                )
+    Only the container headers are parsed; no pixel data is decoded. JPEG
+    frames whose SOF marker lies beyond the supplied bytes are not found.
 
-            # Validate maximum pixel count (prevents decompression bombs)
-            if width * height > MAXIMUM_IMAGE_PIXELS:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"Image resolution too high ({width * height} pixels). "
-                    f"Maximum: {MAXIMUM_IMAGE_PIXELS} pixels",
-                )
+    Args:
+        head: First bytes of the file
+
+    Returns:
+        Tuple of (width, height), or None if the format is not recognised or the
+        dimensions are not within the supplied bytes
+    """
+    # PNG: IHDR is always the first chunk
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24]) if len(head) >= 24 else None
+
+    # WebP: RIFF container with a VP8, VP8L or VP8X first chunk
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+        kind = head[12:16]
+        if kind == b"VP8X":
+            width = 1 + int.from_bytes(head[24:27], "little")
+            height = 1 + int.from_bytes(head[27:30], "little")
+            return width, height
+        if kind == b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if kind == b"VP8 ":
+            width = int.from_bytes(head[26:28], "little") & 0x3FFF
+            height = int.from_bytes(head[28:30], "little") & 0x3FFF
+            return width, height
+        return None
+
+    # JPEG: walk marker segments up to the first start-of-frame
+    if head[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 <= len(head):
+            if head[i] != 0xFF:
+                return None
+            marker = head[i + 1]
+            if marker == 0xFF:
+                i += 1
+                continue
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", head[i + 5 : i + 9])
+                return width, height
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                i += 2
+                continue
+            (seglen,) = struct.unpack(">H", head[i + 2 : i + 4])
+            i += 2 + seglen
+    return None
+
+
+def check_max_dimensions(width: int, height: int) -> None:
+    """
+    Enforce the maximum image dimension and pixel count.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Raises:
+        HTTPException: 413 if either limit is exceeded
+    """
+    pixels = width * height
+    # One combined test on the common path; pick the message only on failure
+    if (
+        width > MAXIMUM_IMAGE_DIMENSION
+        or height > MAXIMUM_IMAGE_DIMENSION
+        or pixels > MAXIMUM_IMAGE_PIXELS
+    ):
+        if width > MAXIMUM_IMAGE_DIMENSION or height > MAXIMUM_IMAGE_DIMENSION:
+            detail = (
+                f"Image dimensions too large ({width}x{height}). "
+                f"Maximum dimension: {MAXIMUM_IMAGE_DIMENSION}px"
+            )
+        else:
+            # Pixel count limit prevents decompression bombs
+            detail = (
+                f"Image resolution too high ({pixels} pixels). "
+                f"Maximum: {MAXIMUM_IMAGE_PIXELS} pixels"
+            )
+        raise HTTPException(status_code=413, detail=detail)
+
+
+def validate_image_file(path: Path, original_filename: str) -> None:
+    """
+    Validate an image file on disk.
+
+    Performs comprehensive validation including format verification, dimension checks,
+    and resolution limits. Protects against corrupted images and potential attacks.
+
+    Args:
+        path: Path to the image file to validate
+        original_filename: Original filename for error reporting
+
+    Raises:
+        HTTPException: 400 for invalid/corrupted images or unsupported formats,
+                      413 for images exceeding size limits
+    """
+    try:
+        # Single open: size comes from the header, so cheap checks reject bad
+        # images before verify() walks the data. Formats outside IMAGE_FORMATS
+        # fail to open and are reported as invalid below.
+        with Image.open(path, formats=IMAGE_FORMATS) as im:
+            width, height = im.size
+            check_max_dimensions(width, height)
 
             # Validate minimum dimensions
-            if width < 32 or height < 32:
+            if width < MINIMUM_IMAGE_RESOLUTION or height < MINIMUM_IMAGE_RESOLUTION:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Image resolution too low ({width}x{height}). "
-                    f"Minimum resolution: 32x32 pixels",
+                    f"Minimum resolution: {MINIMUM_IMAGE_RESOLUTION}x"
+                    f"{MINIMUM_IMAGE_RESOLUTION} pixels",
                 )
 
+            # Verify image integrity last; the instance is unusable afterwards
+            im.verify()
+
     except HTTPException:
         raise
     except Exception as e:
         log.warning(f"Invalid image {original_filename}: {e}")
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid or corrupted image {original_filename} - {str(e)}",
+            detail=f"Invalid or corrupted image {original_filename}",
         )
 
-    # Save to temporary file
-    tmp_dir = settings.DATAPATH / "tmp"
-    tmp_dir.mkdir(parents=True, exist_ok=True)
 
-    tmp = tempfile.NamedTemporaryFile(
-        delete=False, dir=str(tmp_dir), prefix="upload_", suffix=".tmp"
-    )
+def _extract_member(
+    zf: zipfile.ZipFile, info: zipfile.ZipInfo, filename: str, tmppath: Path
+) -> Optional[Tuple[Path, str]]:
+    """
+    Extract one ZIP member to a temporary file and validate it as an image.
+
+    Safe to run from several threads at once: ZipFile serialises access to the
+    underlying file while each member is decompressed independently.
+
+    Args:
+        zf: Open ZipFile the member belongs to
+        info: Member to extract
+        filename: Member's base filename, for error reporting
+        tmppath: Path to extract the member to; it must not exist yet, since
+            save_stream_temp creates it with O_EXCL
+
+    Returns:
+        Tuple of (temp path, SHA-256 hex digest), or None if extraction failed
+
+    Raises:
+        HTTPException: If the image fails validation or limits
+    """
     try:
-        tmp.write(img_bytes)
-        tmp.flush()
-        os.fsync(tmp.fileno())
-        tmp.close()
-        return Path(tmp.name)
-    except Exception as e:
+        # Reject on the declared size before decompressing anything
+        if info.file_size > MAXIMUM_FILE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File {filename} exceeds {settings.UPLOAD_MAX_FILE_MB} MB",
+            )
+        with zf.open(info, "r") as fp:
+            # Check dimensions from the header before spooling the rest
+            head = fp.read(COPY_BUFSIZE)
+            dims = peek_dimensions(head)
+            if dims is not None:
+                check_max_dimensions(*dims)
+            sha256 = save_stream_temp(fp, tmppath, head)
         try:
-            os.unlink(tmp.name)
-        except OSError:
-            pass
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+            validate_image_file(tmppath, filename)
+        except HTTPException:
+            _discard(tmppath)
+            raise
+        return tmppath, sha256
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Failed to process {filename}: {e}")
+        return None
 
 
-def validate_zip_limits(zf: zipfile.ZipFile) -> None:
+def precheck_zip_entry_count(fp: BinaryIO) -> None:
+    """
+    Enforce the file-count limit from the end-of-central-directory record.
+
+    Reads only the archive tail, so oversized archives are rejected before
+    zipfile parses the central directory into one ZipInfo per entry. ZIP64
+    archives and archives without a findable record are left to zipfile and
+    validate_zip_limits.
+
+    Args:
+        fp: Seekable binary stream positioned anywhere; restored to the start
+
+    Raises:
+        HTTPException: 413 if the archive declares too many entries
+    """
+    size = fp.seek(0, os.SEEK_END)
+    tail_len = min(size, _EOCD_MAX_SEARCH)
+    fp.seek(size - tail_len)
+    tail = fp.read(tail_len)
+    fp.seek(0)
+    pos = tail.rfind(_EOCD_SIGNATURE)
+    if pos < 0 or pos + 22 > len(tail):
+        return
+    # Total entry count is the little-endian uint16 at offset 10 of the record
+    (total,) = struct.unpack("<H", tail[pos + 10 : pos + 12])
+    if total != 0xFFFF and total > settings.UPLOADMAXFILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files (limit is {settings.UPLOADMAXFILES})",
+        )
+
+
+def validate_zip_limits(infos: List[zipfile.ZipInfo]) -> None:
     """
     Validate ZIP archive against security and size limits.
 
@@ -131,13 +331,11 @@ def validate_zip_limits(zf: zipfile.ZipFile) -> None:
     zip bombs and resource exhaustion attacks.
 
     Args:
-        zf: Open ZipFile object to validate
+        infos: Member list of the archive, as returned by ZipFile.infolist()
 
     Raises:
         HTTPException: 413 for exceeding limits, 400 for suspicious compression ratios
     """
-    infos = zf.infolist()
-
     # Check file count limit
     if len(infos) > settings.UPLOADMAXFILES:
         raise HTTPException(
@@ -145,8 +343,14 @@ def validate_zip_limits(zf: zipfile.ZipFile) -> None:
             detail=f"Too many files (limit is {settings.UPLOADMAXFILES})",
         )
 
+    # Sum uncompressed and compressed sizes in one pass
+    total_unzipped = total_compressed = 0
+    for i in infos:
+        total_unzipped += i.file_size
+        if not i.is_dir():
+            total_compressed += i.compress_size
+
     # Check uncompressed size limit
-    total_unzipped = sum(i.file_size for i in infos)
     max_bytes = settings.UPLOADMAXUNZIPPEDMB * 1024 * 1024
     if total_unzipped > max_bytes:
         raise HTTPException(
@@ -155,7 +359,6 @@ def validate_zip_limits(zf: zipfile.ZipFile) -> None:
         )
 
     # Check compression ratio to detect zip bombs
-    total_compressed = sum(i.compress_size for i in infos if not i.is_dir())
     if total_compressed > 0:
         compression_ratio = total_unzipped / total_compressed
         if compression_ratio > 100:
@@ -185,6 +388,20 @@ def safe_member_name(member: zipfile.ZipInfo) -> str:
     name = member.filename
     if member.is_dir():
         raise ValueError(f"Directory entry not allowed: {name}")
+    if "\x00" in name:
+        raise ValueError(f"NUL byte in member name: {name!r}")
+
+    # Fast path: names without empty, "." or ".." segments and without a
+    # leading separator are already normalized, so normpath can be skipped
+    if (
+        name
+        and not name.startswith(_UNSAFE_PREFIXES)
+        and not name.endswith(_UNSAFE_SUFFIXES)
+        and not any(s in name for s in _UNSAFE_SUBSTRINGS)
+        and name not in (".", "..")
+    ):
+        return name
+
     normalized = os.path.normpath(name)
     if (
         normalized.startswith("..")
@@ -197,6 +414,58 @@ def safe_member_name(member: zipfile.ZipInfo) -> str:
     return normalized
 
 
+def select_members(
+    infos: List[zipfile.ZipInfo],
+) -> List[Tuple[zipfile.ZipInfo, str, str]]:
+    """
+    Pick the archive members worth extracting, using central-directory data only.
+
+    Skips directories, unsafe paths, files outside a class folder, macOS
+    metadata (__MACOSX/ trees and ._ AppleDouble files), hidden files and
+    non-image extensions, so none of them are ever decompressed.
+
+    Args:
+        infos: Member list of the archive, as returned by ZipFile.infolist()
+
+    Returns:
+        List of (member info, class label, filename) tuples in archive order
+    """
+    members: List[Tuple[zipfile.ZipInfo, str, str]] = []
+    for info in infos:
+        if info.is_dir():
+            continue
+
+        # Validate file path for security
+        try:
+            safepath = safe_member_name(info)
+        except ValueError as e:
+            log.warning(f"Skipping unsafe file: {e}")
+            continue
+
+        # Extract class label from folder structure; safepath is
+        # normalized, so plain string splitting on "/" is enough
+        first = safepath.find("/")
+        if first <= 0:
+            log.warning(f"Skipping file not in class folder: {info.filename}")
+            continue
+
+        class_label = safepath[:first]
+        filename = safepath[safepath.rfind("/") + 1 :]
+
+        # Skip archiver metadata and hidden files
+        if class_label == "__MACOSX" or filename.startswith("."):
+            log.debug(f"Skipping metadata file: {info.filename}")
+            continue
+
+        # Check if file is an allowed image type
+        if not is_allowed_image(filename):
+            log.debug(f"Skipping non-image file: {filename}")
+            continue
+
+        members.append((info, class_label, filename))
+    return members
+
+
 def ingest_zip(file: UploadFile) -> List[Tuple[str, str, str]]:
     """
     Extract and register images from an uploaded ZIP archive.
@@ -217,50 +486,58 @@ def ingest_zip(file: UploadFile) -> List[Tuple[str, str, str]]:
                       500 for processing errors
     """
     file.file.seek(0, os.SEEK_SET)
+    # Buffer the many small local-header reads zipfile makes. Reads of
+    # COPY_BUFSIZE or more bypass the buffer, so concurrent member reads at
+    # different offsets do not keep refilling it.
+    buffered = io.BufferedReader(file.file, buffer_size=ZIP_READ_BUFSIZE)
     try:
-        with zipfile.ZipFile(file.file) as zf:
-            validate_zip_limits(zf)
-            created: List[Tuple[str, str, str]] = []
-
-            for info in zf.infolist():
-                if info.is_dir():
-                    continue
-
-                # Validate file path for security
-                try:
-                    safepath = safe_member_name(info)
-                except ValueError as e:
-                    log.warning(f"Skipping unsafe file: {e}")
-                    continue
-
-                # Extract class label from folder structure
-                path_parts = Path(safepath).parts
-                if len(path_parts) < 2:
-                    log.warning(f"Skipping file not in class folder: {info.filename}")
-                    continue
-
-                class_label = path_parts[0]
-                filename = path_parts[-1]
-
-                # Check if file is an allowed image type
-                if not is_allowed_image(filename):
-                    log.debug(f"Skipping non-image file: {filename}")
-                    continue
-
-                # Extract, validate, and register image
-                try:
-                    with zf.open(info, "r") as fp:
-                        data = fp.read()
-                    tmppath = validate_and_save_temp(data, filename)
-                    asset = registry.add_file(
-                        tmppath, original_filename=filename, label=class_label
+        precheck_zip_entry_count(buffered)
+        with zipfile.ZipFile(buffered) as zf:
+            infos = zf.infolist()
+            validate_zip_limits(infos)
+            members = select_members(infos)
+
+            # Temp files are named per upload and member index
+            tmp_dir = settings.TMPPATH
+            upload_id = uuid.uuid4().hex
+
+            # (temp path, filename, class label, sha256) awaiting registration
+            pending: List[Tuple[Path, str, str, str]] = []
+            with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as ex:
+                futures = [
+                    ex.submit(
+                        _extract_member,
+                        zf,
+                        info,
+                        filename,
+                        tmp_dir / f"upload_{upload_id}_{idx}.tmp",
                     )
-                    created.append((asset.id, asset.filename, class_label))
-                except HTTPException:
+                    for idx, (info, _, filename) in enumerate(members)
+                ]
+                try:
+                    for (_, class_label, filename), fut in zip(members, futures):
+                        result = fut.result()
+                        if result is not None:
+                            tmppath, sha256 = result
+                            pending.append((tmppath, filename, class_label, sha256))
+                except BaseException:
+                    # Nothing has been registered yet; stop outstanding work and
+                    # drop every temp file that was written
+                    for fut in futures:
+                        fut.cancel()
+                    for fut in futures:
+                        if fut.cancelled() or fut.exception() is not None:
+                            continue
+                        if fut.result() is not None:
+                            _discard(fut.result()[0])
                     raise
-                except Exception as e:
-                    log.error(f"Failed to process {filename}: {e}")
-                    continue
+
+            # Register every image in one transaction; digests were computed
+            # while streaming, so files are not re-read
+            created: List[Tuple[str, str, str]] = [
+                (asset.id, asset.filename, asset.label)
+                for asset in registry.add_files(pending)
+            ]
 
             if not created:
                 raise HTTPException(
@@ -277,3 +554,6 @@ def ingest_zip(file: UploadFile) -> List[Tuple[str, str, str]]:
     except Exception as e:
         log.exception(f"Unexpected error during ZIP ingestion: {e}")
         raise HTTPException(status_code=500, detail="Failed to process ZIP file")
+    finally:
+        # Release the wrapper without closing the underlying upload file
+        buffered.detach()
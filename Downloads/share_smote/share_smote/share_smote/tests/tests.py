@@ -1,9 +1,12 @@
 import pytest
 import requests
+import os
 import io
 import zipfile
 import json
+import struct
 import time
+import zlib
 from pathlib import Path
 from PIL import Image
 import numpy as np
@@ -17,6 +20,10 @@ class APIConfig:
     TIMEOUT = 120
 
 
+# Backend package root, importable for in-process tests of service modules
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend_python"
+
+
 @pytest.fixture(scope="session")
 def api_config():
     return APIConfig()
@@ -44,6 +51,19 @@ def cleanup_assets(session, api_config):
             print(f"Failed to cleanup asset {asset_id}: {e}")
 
 
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("data")
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.syspath_prepend(str(BACKEND_DIR))
+        mp.chdir(data_dir)
+        mp.setenv("DATADIR", str(data_dir))
+        mp.setenv("SECRET_KEY", "s" * 32)
+        mp.setenv("VALID_API_KEYS", json.dumps([APIConfig.API_KEY]))
+        yield data_dir
+
+
 def create_test_image(
     width: int = 256, height: int = 256, color: Tuple[int, int, int] = (255, 0, 0)
 ) -> bytes:
@@ -53,6 +73,37 @@ def create_test_image(
     return buffer.getvalue()
 
 
+def create_png_header(width: int, height: int) -> bytes:
+    """PNG signature and IHDR chunk only, declaring the given dimensions."""
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    crc = zlib.crc32(b"IHDR" + ihdr)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", len(ihdr))
+        + b"IHDR"
+        + ihdr
+        + struct.pack(">I", crc)
+    )
+
+
+def create_eocd_record(total_entries: int, comment: bytes = b"") -> bytes:
+    """Bare end-of-central-directory record with no central directory behind it."""
+    return (
+        struct.pack(
+            "<4sHHHHIIH",
+            b"PK\x05\x06",
+            0,
+            0,
+            total_entries,
+            total_entries,
+            0,
+            0,
+            len(comment),
+        )
+        + comment
+    )
+
+
 def create_test_zip(class_structure: Dict[str, int]) -> bytes:
     zip_buffer = io.BytesIO()
 
@@ -135,6 +186,67 @@ class TestUpload:
 
         assert response.status_code == 400
 
+    def test_upload_oversized_dimensions(self, session, api_config):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("cat/huge.png", create_png_header(20000, 20000))
+
+        files = {"file": ("test.zip", zip_buffer.getvalue(), "application/zip")}
+
+        response = session.post(
+            f"{api_config.BASE_URL}/upload/zip", files=files, timeout=api_config.TIMEOUT
+        )
+
+        assert response.status_code == 413
+
+    def test_upload_too_many_entries(self, session, api_config):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zf:
+            for i in range(201):
+                zf.writestr(f"cat/img_{i}.png", b"")
+
+        files = {"file": ("test.zip", zip_buffer.getvalue(), "application/zip")}
+
+        response = session.post(
+            f"{api_config.BASE_URL}/upload/zip", files=files, timeout=api_config.TIMEOUT
+        )
+
+        assert response.status_code == 413
+
+    def test_upload_entry_count_precheck(self, session, api_config):
+        # Without a central directory zipfile alone would answer 400, so a 413
+        # can only come from the end-of-central-directory precheck
+        for comment in (b"", b"trailing archive comment " * 40):
+            files = {
+                "file": ("test.zip", create_eocd_record(201, comment), "application/zip")
+            }
+
+            response = session.post(
+                f"{api_config.BASE_URL}/upload/zip",
+                files=files,
+                timeout=api_config.TIMEOUT,
+            )
+
+            assert response.status_code == 413
+
+    def test_upload_zip_with_comment(self, session, api_config, cleanup_assets):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("cat/img_0.png", create_test_image())
+            zf.writestr("dog/img_0.png", create_test_image(color=(0, 0, 255)))
+            zf.comment = b"trailing archive comment " * 40
+
+        files = {"file": ("test.zip", zip_buffer.getvalue(), "application/zip")}
+
+        response = session.post(
+            f"{api_config.BASE_URL}/upload/zip", files=files, timeout=api_config.TIMEOUT
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        cleanup_assets.extend([asset["id"] for asset in data["assets"]])
+        assert data["count"] == 2
+
 
 class TestAssetManagement:
     def test_list_and_get_assets(self, session, api_config, cleanup_assets):
@@ -440,5 +552,105 @@ class TestIntegration:
             assert ratio > 0.5
 
 
+class TestRegistry:
+    def test_migrate_legacy_index(self, backend, tmp_path):
+        from assets.registry import AssetRegistry
+
+        legacy = tmp_path / "assetsindex.json"
+        legacy.write_text(
+            json.dumps(
+                {
+                    "assets": {
+                        "a1": {
+                            "id": "a1",
+                            "filename": "cat.png",
+                            "relpath": "assets/a1.png",
+                            "mimetype": "image/png",
+                            "size": 10,
+                            "sha256": "0" * 64,
+                            "created_at": 1700000000.5,
+                            "label": "cat",
+                        },
+                        "a2": {
+                            "id": "a2",
+                            "filename": "dog.png",
+                            "relpath": "assets/a2.png",
+                            "mimetype": "image/png",
+                            "size": 20,
+                            "sha256": "1" * 64,
+                            "created_at": 1700000001.25,
+                        },
+                        "bad": {"id": "bad", "filename": "broken.png"},
+                    }
+                }
+            )
+        )
+
+        registry = AssetRegistry(tmp_path / "assetsindex.db", legacy_index_path=legacy)
+
+        assets = registry.list_assets()
+        assert [asset.id for asset in assets] == ["a1", "a2"]
+        assert assets[0].created_at == 1700000000.5
+        assert assets[0].label == "cat"
+        assert assets[1].created_at == 1700000001.25
+        assert assets[1].label is None
+
+        assert not legacy.exists()
+        assert (tmp_path / "assetsindex.json.migrated").exists()
+
+        reopened = AssetRegistry(tmp_path / "assetsindex.db", legacy_index_path=legacy)
+        assert len(reopened.list_assets()) == 2
+
+
+class TestParamsStore:
+    def test_get_sees_write_from_other_store(self, backend):
+        from params.service import ParamsStore
+
+        store = ParamsStore()
+        other = ParamsStore()
+
+        store.set({"kneighbors": 5})
+        assert store.get() == {"kneighbors": 5}
+        before = os.stat(store.path)
+
+        other.set({"kneighbors": 7})
+        # Same size and mtime, as on a filesystem with coarse timestamps
+        os.utime(store.path, ns=(before.st_atime_ns, before.st_mtime_ns))
+        after = os.stat(store.path)
+        assert (after.st_size, after.st_mtime_ns) == (
+            before.st_size,
+            before.st_mtime_ns,
+        )
+
+        assert store.get() == {"kneighbors": 7}
+
+
+class TestCors:
+    def test_wildcard_origins(self, backend):
+        from starlette.middleware.cors import CORSMiddleware
+        from main import _split_cors_origins
+
+        origins, origin_regex = _split_cors_origins(
+            ["https://app.example.com", "https://*.example.org"]
+        )
+        assert origins == ["https://app.example.com"]
+
+        cors = CORSMiddleware(
+            app=None, allow_origins=origins, allow_origin_regex=origin_regex
+        )
+
+        # Exact origin is matched through allow_origins
+        assert cors.is_allowed_origin("https://app.example.com")
+        assert not cors.is_allowed_origin("https://api.example.com")
+
+        # Wildcard origin matches subdomains only, on the configured scheme
+        assert cors.is_allowed_origin("https://api.example.org")
+        assert cors.is_allowed_origin("https://eu.api.example.org")
+        assert not cors.is_allowed_origin("https://example.org")
+        assert not cors.is_allowed_origin("http://api.example.org")
+        assert not cors.is_allowed_origin("https://api.example.org.evil.com")
+        assert not cors.is_allowed_origin("https://evil.com/.example.org")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])